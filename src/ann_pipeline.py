@@ -67,6 +67,15 @@ if __name__ == "__main__":
 	config["hp_max_hidden_layers"] = int(config["hp_max_hidden_layers"])
 	config["hp_hidden_layer_size_choices"] = [int(size) for size in config["hp_hidden_layer_size_choices"]]
 	config["hp_search_trials"] = int(config["hp_search_trials"])
+	config["hp_num_initial_points"] = int(config["hp_num_initial_points"])
+	config["hp_keep_top_trials"] = int(config["hp_keep_top_trials"])
+	config["hp_trial_scratch_dir"] = str(config["hp_trial_scratch_dir"])
+	config["hp_tensorboard_trial_interval"] = int(config["hp_tensorboard_trial_interval"])
+	config["hp_warm_start_dirs"] = [str(d) for d in config["hp_warm_start_dirs"]]
+	config["hp_warm_start_trials"] = int(config["hp_warm_start_trials"])
+	config["hp_warm_start_num_initial_points"] = int(config["hp_warm_start_num_initial_points"])
+	config["hp_warm_start_max_trials"] = int(config["hp_warm_start_max_trials"])
+	config["hp_cold_start_dir"] = str(config["hp_cold_start_dir"])
 	config["ann_max_epochs"] = int(config["ann_max_epochs"])
 	config["ann_early_stopping_patience"] = int(config["ann_early_stopping_patience"])
 	
@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 from datetime import timedelta
 
 import argparse
@@ -32,28 +33,27 @@ def load_raw_demand(raw_demand_filepath: str) -> pd.DataFrame:
     raw_demand = pd.read_csv(raw_demand_filepath,
         parse_dates=True,
         index_col='date_time',
-        usecols=['date_time','cleaned demand (MW)'])
+        usecols=['date_time','cleaned demand (MW)'],
+        dtype={'cleaned demand (MW)': np.float32})
     return raw_demand
 
 def load_raw_temp(raw_temp_filepath: str) -> pd.DataFrame:
     #TODO: ADD DOCSTRING
     raw_temp = pd.read_csv(raw_temp_filepath,
         index_col=0,
-        parse_dates=True)
+        parse_dates=True,
+        dtype={'Temperature (K)': np.float32})
     return raw_temp
 
 
 def format_dataframe(raw_data:pd.DataFrame, col_mapper: dict, years:list) -> pd.DataFrame:
     #TODO: ADD DOCSTRING
-    # make new dataframe
-    cleaned_data = raw_data.copy()
+    # resample to daily (new dataframe, raw data is not modified)
+    cleaned_data = raw_data.resample(timedelta(days=1)).max()
 
     # rename columns
     cleaned_data.index.rename("Datetime", inplace=True)
     cleaned_data.rename(columns=col_mapper, inplace=True)
-
-    # resample to daily
-    cleaned_data = cleaned_data.resample(timedelta(days=1)).max()
     
     # remove leap day
     cleaned_data = cleaned_data[~((cleaned_data.index.month == 2) & (cleaned_data.index.day == 29))]
@@ -15,8 +15,8 @@ def evaluate(config: dict) -> None:
 	for dataset in ["train", "val", "test"]:
 
 		# load features/labels
-		features = pd.read_csv(config[f"{dataset}_features_file"], index_col='Datetime', parse_dates=True)
-		labels = pd.read_csv(config[f"{dataset}_labels_file"], index_col='Datetime', parse_dates=True)
+		features = pd.read_csv(config[f"{dataset}_features_file"], index_col='Datetime', parse_dates=True).astype(np.float32)
+		labels = pd.read_csv(config[f"{dataset}_labels_file"], index_col='Datetime', parse_dates=True).astype(np.float32)
 		
 		# make predictions
 		predictions = model.predict(features.values)
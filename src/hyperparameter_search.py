@@ -1,4 +1,10 @@
 import os
+import glob
+import hashlib
+import json
+import time
+import warnings
+import numpy as np
 import pandas as pd
 import tensorflow as tf
 import keras_tuner as kt
@@ -25,8 +31,316 @@ class HPModelBuilder:
 		
 		return build_model(self.normalizer, hidden_layers, units, learning_rate)
 
+class WarmStartBayesianOptimizationOracle(kt.oracles.BayesianOptimizationOracle):
+	'''
+	Bayesian optimization oracle which evaluates a list of warm-start 
+	hyperparameter values (e.g. the best trials of other searches) before
+	falling back to Bayesian optimization. With `num_initial_points` set to 
+	the number of warm-start values, they replace the random initial points.
+	'''
+
+	def __init__(self, *args, warm_start_values: list = None, **kwargs):
+
+		super().__init__(*args, **kwargs)
+
+		self.warm_start_values = warm_start_values or []
+
+	def populate_space(self, trial_id):
+
+		# evaluate warm-start values first
+		warm_start_index = len(self.trials)
+
+		if warm_start_index < len(self.warm_start_values):
+			values = {hp.name: hp.default for hp in self.hyperparameters.space}
+			values.update(self.warm_start_values[warm_start_index])
+
+			# exclude warm-start values from later random sampling
+			self._tried_so_far.add(self._compute_values_hash(values))
+
+			return {"status": kt.engine.trial.TrialStatus.RUNNING, "values": values}
+
+		return super().populate_space(trial_id)
+
+class IOTimer:
+	'''
+	Accumulates seconds spent on I/O. Shared (not copied) between the 
+	callbacks which Keras Tuner deep-copies for each trial.
+	'''
+
+	def __init__(self):
+		self.seconds = 0.
+
+	def __deepcopy__(self, memo):
+		return self
+
+class CheckpointTimer(tf.keras.callbacks.Callback):
+	'''
+	Times the checkpoint writes of the tuner (`model.save_weights`) during training.
+	'''
+
+	def __init__(self, io_timer: IOTimer):
+		super().__init__()
+		self.io_timer = io_timer
+
+	def set_model(self, model):
+		super().set_model(model)
+
+		save_weights = model.save_weights
+
+		def timed_save_weights(*args, **kwargs):
+			start = time.perf_counter()
+			save_weights(*args, **kwargs)
+			self.io_timer.seconds += time.perf_counter() - start
+
+		model.save_weights = timed_save_weights
+
+class TimedTensorBoard(tf.keras.callbacks.TensorBoard):
+	'''
+	TensorBoard callback which times its event writes.
+	'''
+
+	def __init__(self, io_timer: IOTimer, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.io_timer = io_timer
+
+	def on_epoch_end(self, epoch, logs=None):
+		start = time.perf_counter()
+		super().on_epoch_end(epoch, logs)
+		self.io_timer.seconds += time.perf_counter() - start
+
+	def on_train_end(self, logs=None):
+		start = time.perf_counter()
+		super().on_train_end(logs)
+		self.io_timer.seconds += time.perf_counter() - start
+
+class BoundedStorageTuner(kt.Tuner):
+	'''
+	Tuner with bounded trial storage. Checkpoints of in-flight trials are 
+	written to a scratch directory (a local path, or "ram://..." to keep them 
+	in memory) and only the top-k completed trials are persisted to the search 
+	directory. TensorBoard callbacks are only attached to every n-th trial.
+	I/O time of checkpoint writes, TensorBoard events and trial-end storage
+	is logged per trial.
+	'''
+
+	def __init__(self, *args, 
+		keep_top_trials: int = 0, 
+		scratch_dir: str = "", 
+		tensorboard_trial_interval: int = 1, 
+		**kwargs):
+
+		super().__init__(*args, **kwargs)
+
+		self.keep_top_trials = keep_top_trials
+		self.scratch_dir = scratch_dir
+		self.tensorboard_trial_interval = tensorboard_trial_interval
+
+		self._in_flight_trial_ids = set()
+		self._kept_trial_ids = set(self.oracle.trials)
+		self._trial_start_times = {}
+		self.io_timer = IOTimer()
+		self.io_log = []
+
+		# unique per search, so concurrent searches can share a scratch directory
+		self._scratch_project_name = f"{self.project_name}_{hashlib.md5(os.path.realpath(self.project_dir).encode()).hexdigest()[:8]}"
+
+	def _get_checkpoint_fname(self, trial_id):
+
+		if self.scratch_dir and trial_id in self._in_flight_trial_ids:
+			return os.path.join(self.scratch_dir, self._scratch_project_name, f"trial_{trial_id}", "checkpoint")
+		
+		return super()._get_checkpoint_fname(trial_id)
+
+	def on_trial_begin(self, trial):
+
+		self._in_flight_trial_ids.add(trial.trial_id)
+		self._trial_start_times[trial.trial_id] = time.perf_counter()
+		self.io_timer.seconds = 0.
+		
+		super().on_trial_begin(trial)
+
+	def run_trial(self, trial, *args, **kwargs):
+
+		# only log every n-th trial to tensorboard
+		trial_number = len(self.oracle.trials) - 1
+		log_trial = self.tensorboard_trial_interval > 0 and trial_number % self.tensorboard_trial_interval == 0
+		
+		if not log_trial:
+			kwargs["callbacks"] = [callback for callback in kwargs.get("callbacks", []) 
+				if not isinstance(callback, tf.keras.callbacks.TensorBoard)]
+
+		kwargs["callbacks"] = kwargs.get("callbacks", []) + [CheckpointTimer(self.io_timer)]
+
+		return super().run_trial(trial, *args, **kwargs)
+
+	def on_trial_end(self, trial):
+
+		fit_io_seconds = self.io_timer.seconds
+		io_start = time.perf_counter()
+
+		super().on_trial_end(trial)
+
+		# find trials to keep
+		in_flight_checkpoint = self._get_checkpoint_fname(trial.trial_id)
+		self._in_flight_trial_ids.discard(trial.trial_id)
+
+		if self.keep_top_trials > 0:
+			top_trial_ids = {t.trial_id for t in self.oracle.get_best_trials(self.keep_top_trials)}
+		else:
+			top_trial_ids = self._kept_trial_ids | {trial.trial_id}
+
+		# persist or discard checkpoint of finished trial
+		keep = trial.trial_id in top_trial_ids
+		
+		if in_flight_checkpoint != self._get_checkpoint_fname(trial.trial_id):
+			move_checkpoint(in_flight_checkpoint, self._get_checkpoint_fname(trial.trial_id) if keep else None)
+		elif not keep:
+			move_checkpoint(in_flight_checkpoint, None)
+
+		# remove checkpoints of trials which dropped out of the top-k
+		for trial_id in self._kept_trial_ids - top_trial_ids:
+			move_checkpoint(self._get_checkpoint_fname(trial_id), None)
+
+		self._kept_trial_ids = top_trial_ids
+
+		io_end = time.perf_counter()
+
+		self.io_log.append({"trial_id": trial.trial_id,
+			"trial_seconds": io_end - self._trial_start_times.pop(trial.trial_id, io_start),
+			"fit_io_seconds": fit_io_seconds,
+			"trial_end_io_seconds": io_end - io_start,
+			"io_seconds": fit_io_seconds + io_end - io_start,
+			"kept": keep})
+
+def move_checkpoint(checkpoint_prefix: str, destination_prefix: str = None) -> None:
+	'''
+	Move all files of a checkpoint to a new prefix, or delete them if no 
+	destination is given. Uses tf.io.gfile to support the "ram://" filesystem.
+	'''
+
+	checkpoint_dir, checkpoint_name = os.path.split(checkpoint_prefix)
+
+	if not tf.io.gfile.exists(checkpoint_dir):
+		return None
+
+	if destination_prefix is not None:
+		destination_dir, destination_name = os.path.split(destination_prefix)
+		tf.io.gfile.makedirs(destination_dir)
+
+	for filename in tf.io.gfile.listdir(checkpoint_dir):
+		if not filename.startswith(checkpoint_name):
+			continue
+
+		filepath = os.path.join(checkpoint_dir, filename)
+
+		if destination_prefix is not None:
+			destination = os.path.join(destination_dir, destination_name + filename[len(checkpoint_name):])
+			tf.io.gfile.copy(filepath, destination, overwrite=True)
+
+		tf.io.gfile.remove(filepath)
+
+	return None
+
+def get_directory_size(directory: str) -> int:
+
+	size = 0
+
+	for dirpath, _, filenames in os.walk(directory):
+		for filename in filenames:
+			size += os.path.getsize(os.path.join(dirpath, filename))
+
+	return size
+
+def load_completed_trials(search_dirs: list) -> list:
+	'''
+	Load (search directory, hyperparameter values, score) of completed trials 
+	from Keras Tuner project directories. Directories may be glob patterns.
+	'''
+
+	completed_trials = []
+
+	for search_dir in sorted({d for pattern in search_dirs for d in glob.glob(pattern)}):
+		for trial_file in glob.glob(os.path.join(search_dir, "trial_*", "trial.json")):
+			with open(trial_file, 'r') as trial_input:
+				trial_state = json.load(trial_input)
+
+			if trial_state.get("status") == "COMPLETED" and trial_state.get("score") is not None:
+				completed_trials.append((search_dir, trial_state["hyperparameters"]["values"], trial_state["score"]))
+
+	return completed_trials
+
+def get_values_in_search_space(values: dict, hp_search_space: kt.HyperParameters) -> dict:
+	'''
+	Restrict hyperparameter values to those used by the model builder (hidden layers,
+	learning rate, and units of the active layers). Returns None if any of them is 
+	missing or outside the search space (e.g. from a search with a different config).
+	'''
+
+	space = {hp.name: hp for hp in hp_search_space.space}
+
+	if "hidden_layers" not in values:
+		return None
+
+	names = ["hidden_layers", "learning_rate"] + [f"units_{i}" for i in range(int(values["hidden_layers"]))]
+
+	for name in names:
+		if name not in space or name not in values:
+			return None
+
+		hp = space[name]
+
+		if isinstance(hp, kt.engine.hyperparameters.Choice):
+			if values[name] not in hp.values:
+				return None
+		elif not hp.min_value <= values[name] <= hp.max_value:
+			return None
+
+	return {name: values[name] for name in names}
+
+def select_warm_start_values(completed_trials: list, num_trials: int, hp_search_space: kt.HyperParameters) -> list:
+	'''
+	Select the hyperparameter values of the best trials across searches. 
+	Scores of different balancing authorities are not comparable, so trials 
+	are ranked within their own search and ordered by relative rank (ties broken
+	by score and search directory, so the order is reproducible when resuming). 
+	Trials outside the search space are skipped.
+	'''
+
+	ranked_trials = []
+	
+	for search_dir in sorted({t[0] for t in completed_trials}):
+		search_trials = sorted([t for t in completed_trials if t[0] == search_dir], key=lambda t: t[2])
+		
+		for rank, (_, values, score) in enumerate(search_trials):
+			ranked_trials.append((rank / len(search_trials), score, search_dir, values))
+
+	# remove duplicate architectures, best first
+	warm_start_values = []
+	
+	for _, _, _, values in sorted(ranked_trials, key=lambda t: t[:3]):
+		values = get_values_in_search_space(values, hp_search_space)
+
+		if values is not None and values not in warm_start_values:
+			warm_start_values.append(values)
+
+	return warm_start_values[:num_trials]
+
+def get_trials_to_match_score(tuner: kt.Tuner, target_score: float) -> int:
+	'''
+	Number of trials (in start order) needed to reach a val_loss at or below target_score. 
+	Returns None if the target is not reached.
+	'''
+
+	trials = [tuner.oracle.trials[t] for t in tuner.oracle.start_order if t in tuner.oracle.trials]
+
+	for i, trial in enumerate(trials):
+		if trial.score is not None and trial.score <= target_score:
+			return i + 1
+
+	return None
+
 def load_data(data_file: str) -> pd.DataFrame:
-	return pd.read_csv(data_file, index_col="Datetime", parse_dates=True)
+	return pd.read_csv(data_file, index_col="Datetime", parse_dates=True).astype(np.float32)
 
 def generate_search_space(min_hidden_layers: int,
 	max_hidden_layers: int,
@@ -54,24 +368,40 @@ def get_tuner(model_builder: HPModelBuilder,
 	hp_search_space: kt.HyperParameters,
 	search_dir: str, 
 	search_name: str, 
-	search_trials:int) -> kt.BayesianOptimization:
+	search_trials:int,
+	keep_top_trials: int = 0,
+	scratch_dir: str = "",
+	tensorboard_trial_interval: int = 1,
+	warm_start_values: list = None,
+	num_initial_points: int = 2) -> BoundedStorageTuner:
 	'''
 	Create or load an instance of a keras hyperparameter tuning object.
 	For a given tuner, no overwrite will occur (even with changed parameters).
+	Only the checkpoints of the best `keep_top_trials` trials are kept (0 keeps all).
+	Trials with `warm_start_values` are evaluated before Bayesian optimization,
+	which starts after `num_initial_points` completed trials.
 	''' 
 
 	# define search parameters
-	tuner = kt.BayesianOptimization(
-		model_builder.build_model_from_hyperparameters,
+	oracle = WarmStartBayesianOptimizationOracle(
 		objective='val_loss',
 		max_trials=search_trials,
+		num_initial_points=num_initial_points,
+		hyperparameters=hp_search_space,
+		warm_start_values=warm_start_values)
+
+	tuner = BoundedStorageTuner(
+		oracle=oracle,
+		hypermodel=model_builder.build_model_from_hyperparameters,
 		directory=search_dir,
 		project_name=search_name,
-		hyperparameters=hp_search_space)
+		keep_top_trials=keep_top_trials,
+		scratch_dir=scratch_dir,
+		tensorboard_trial_interval=tensorboard_trial_interval)
 
 	return tuner
 
-def search(tuner: kt.BayesianOptimization, 
+def search(tuner: kt.Tuner, 
 	train_features: pd.DataFrame, 
 	train_labels: pd.DataFrame, 
 	val_features: pd.DataFrame, 
@@ -81,7 +411,10 @@ def search(tuner: kt.BayesianOptimization,
 
 	# callback
 	early_stopping_callback = tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=early_stopping_patience)
-	tensorboard_callback = tf.keras.callbacks.TensorBoard(os.path.join(tuner.directory, tuner.project_name))
+	tensorboard_callback = TimedTensorBoard(tuner.io_timer,
+		os.path.join(tuner.directory, tuner.project_name),
+		write_graph=False,
+		profile_batch=0)
 
 	# search
 	tuner.search(train_features, 
@@ -93,13 +426,13 @@ def search(tuner: kt.BayesianOptimization,
 
 	return None
 
-def get_best_hyperparameters(tuner: kt.BayesianOptimization) -> kt.HyperParameters:
+def get_best_hyperparameters(tuner: kt.Tuner) -> kt.HyperParameters:
 	return tuner.get_best_hyperparameters()[0]
 
-def get_best_model(tuner: kt.BayesianOptimization) -> tf.keras.Sequential:
+def get_best_model(tuner: kt.Tuner) -> tf.keras.Sequential:
 	return tuner.get_best_models()[0]
 
-def get_best_trial_id(tuner: kt.BayesianOptimization) -> int:
+def get_best_trial_id(tuner: kt.Tuner) -> int:
 	return tuner.oracle.get_best_trials()[0].trial_id
 
 def extract_hyperparameters_to_series(hyperparameters: kt.HyperParameters) -> pd.Series:
@@ -113,6 +446,9 @@ def extract_hyperparameters_to_series(hyperparameters: kt.HyperParameters) -> pd
 
 	return hp_series
 
+def extract_io_log_to_dataframe(tuner: BoundedStorageTuner) -> pd.DataFrame:
+	return pd.DataFrame(tuner.io_log, columns=["trial_id", "trial_seconds", "fit_io_seconds", "trial_end_io_seconds", "io_seconds", "kept"])
+
 def extract_history_to_dataframe(history: tf.keras.callbacks.History) -> pd.DataFrame:
 	return pd.DataFrame.from_dict(history.history)
 
@@ -135,12 +471,45 @@ def hyperparameter_search(config: dict) -> None:
 	normalizer = get_normalization_layer(train_features)
 	model_builder = HPModelBuilder(normalizer)
 
+	# get warm-start trials from other searches
+	search_project_dir = os.path.join(config["hyperparameter_search_dir"], config["hyperparameter_search_name"])
+	search_trials = config["hp_search_trials"]
+	num_initial_points = config["hp_num_initial_points"]
+	warm_start_values = []
+
+	if config["hp_warm_start_trials"] > 0 and len(config["hp_warm_start_dirs"]) > 0:
+		# exclude this search, and all searches of this balancing authority 
+		# when comparing against its cold-start search
+		excluded_dirs = {os.path.realpath(search_project_dir)}
+
+		if config["hp_cold_start_dir"]:
+			excluded_dirs.add(os.path.realpath(config["hp_cold_start_dir"]))
+
+		completed_trials = [t for t in load_completed_trials(config["hp_warm_start_dirs"]) 
+			if os.path.realpath(t[0]) not in excluded_dirs
+			and not (config["hp_cold_start_dir"] and config["bal_auth"] in os.path.realpath(t[0]).split(os.sep))]
+		warm_start_values = select_warm_start_values(completed_trials, config["hp_warm_start_trials"], hp_search_space)
+
+		if len(warm_start_values) == 0:
+			warnings.warn(f"No prior trials in the search space found in {config['hp_warm_start_dirs']}, running a cold-start search.")
+
+	if len(warm_start_values) > 0:
+		num_initial_points = config["hp_warm_start_num_initial_points"] or len(warm_start_values)
+
+		if config["hp_warm_start_max_trials"] > 0:
+			search_trials = config["hp_warm_start_max_trials"]
+
 	# get tuner
 	tuner = get_tuner(model_builder,
 		hp_search_space,
 		config["hyperparameter_search_dir"],
 		config["hyperparameter_search_name"],
-		config["hp_search_trials"])
+		search_trials,
+		config["hp_keep_top_trials"],
+		config["hp_trial_scratch_dir"],
+		config["hp_tensorboard_trial_interval"],
+		warm_start_values,
+		num_initial_points)
 
 	# search
 	search(tuner, 
@@ -154,6 +523,33 @@ def hyperparameter_search(config: dict) -> None:
 	# get metadata from best model
 	best_hyperparameters = get_best_hyperparameters(tuner)
 	best_hyperparameters_series = extract_hyperparameters_to_series(best_hyperparameters)
+
+	# report storage footprint and trial i/o
+	# (appended, so resumed or repeated runs keep the log of earlier trials)
+	io_log_df = extract_io_log_to_dataframe(tuner)
+
+	if len(io_log_df) > 0:
+		io_log_df.to_csv(config["hyperparameter_search_io_file"], index=False, mode='a',
+			header=not os.path.exists(config["hyperparameter_search_io_file"]))
+
+	if os.path.exists(config["hyperparameter_search_io_file"]):
+		io_log_df = pd.read_csv(config["hyperparameter_search_io_file"])
+
+	best_hyperparameters_series["search_dir_mb"] = f"{get_directory_size(tuner.project_dir) / 1e6:.1f}"
+	if len(io_log_df) > 0:
+		best_hyperparameters_series["mean_trial_io_seconds"] = f"{io_log_df['io_seconds'].mean():.2f}"
+
+	# report warm start against cold-start search
+	best_hyperparameters_series["warm_start_trials"] = len(warm_start_values)
+
+	if config["hp_cold_start_dir"]:
+		cold_start_scores = [t[2] for t in load_completed_trials([config["hp_cold_start_dir"]])]
+
+		if len(cold_start_scores) > 0:
+			cold_start_best = min(cold_start_scores)
+			best_hyperparameters_series["cold_start_trials"] = len(cold_start_scores)
+			best_hyperparameters_series["cold_start_best_val_loss"] = f"{cold_start_best:.2f}"
+			best_hyperparameters_series["trials_to_match_cold_start"] = get_trials_to_match_score(tuner, cold_start_best)
 	best_hyperparameters_series.to_csv(config["ann_summary_file"], header=False)
 	
 	# save model, history, and hyperparameters
@@ -1,11 +1,12 @@
 import pandas as pd 
 import numpy as np
-from datetime import datetime
 import argparse
 
 FEATURE_COL_MAPPER = {"Demand (MW)" : "D",
 						"Temperature (K)" : "T"}
 
+LABEL_COL = "D"
+
 def process_data(cleaned_data_file: str, 
 				train_features_file: str, 
 				train_labels_file: str,
@@ -17,10 +18,8 @@ def process_data(cleaned_data_file: str,
 	Convert cleaned data into train/validation/test datasets for machine learning model. Save output to csv
 	'''
 
-	cleaned_data = load_cleaned_data(cleaned_data_file)
-
 	# initialize dataframe
-	processed_data = cleaned_data.copy()
+	processed_data = load_cleaned_data(cleaned_data_file)
 	processed_data.rename(columns=FEATURE_COL_MAPPER, inplace=True)
 
 	# Feature engineer fixed effects
@@ -45,42 +44,38 @@ def process_data(cleaned_data_file: str,
 
 def load_cleaned_data(cleaned_data_file: str) -> pd.DataFrame:
 
-    cleaned_data = pd.read_csv(cleaned_data_file,index_col='Datetime',parse_dates=True)
+    cleaned_data = pd.read_csv(cleaned_data_file,index_col='Datetime',parse_dates=True,
+        dtype={col: np.float32 for col in FEATURE_COL_MAPPER})
 
     return cleaned_data
 
 def populate_fixed_effects(processed_data: pd.DataFrame) -> None:
 	'''
 	Add fixed effect features to DataFrame:
-	- weekday
-	- trigonometric day of year
+	- weekday (int8)
+	- trigonometric day of year (float32)
 	'''
 	
-	processed_data['W'] = processed_data.index.weekday
+	processed_data['W'] = processed_data.index.weekday.astype(np.int8)
 
 	# calculate julian_day
-	julian_day = processed_data.index.map(get_julian_day)
+	julian_day = processed_data.index.dayofyear.to_numpy(dtype=np.float32)
 
-	processed_data['M-sine'] = np.sin(2 * np.pi * julian_day / 365.)
-	processed_data['M-cosine'] = np.cos(2 * np.pi * julian_day / 365.)
+	processed_data['M-sine'] = np.sin(np.float32(2 * np.pi / 365.) * julian_day)
+	processed_data['M-cosine'] = np.cos(np.float32(2 * np.pi / 365.) * julian_day)
 
 	return None
 
-def get_julian_day(date_time: datetime) -> int:
-
-	return date_time.timetuple().tm_yday
-
 def split_data(processed_data: pd.DataFrame) -> tuple:
 	'''
 	Split data into train, validation, and test dataset. 
 	To include data spanning the available data range in each 
 	subset while ensuring correct seasonal distributions,
 	months are shuffled between years creating a 50/25/25 split.
-	'''
 
-	# initialize dataset
-	test_data = pd.DataFrame()
-	val_data = pd.DataFrame()
+	Rows are gathered once into a single contiguous float32 array 
+	(label column last), and the returned datasets are views of it.
+	'''
 
 	# create shuffled months
 	np.random.seed(1)
@@ -93,24 +88,51 @@ def split_data(processed_data: pd.DataFrame) -> tuple:
 	# shuffle years for training and validation data
 	test_val_years = [np.random.choice(range(min(years),max(years)+1),2*num_training_years,replace=False) for i in range(12)]
 
+	# assign rows to datasets (0: train, 1: val, 2: test)
+	months = processed_data.index.month.to_numpy()
+	data_years = processed_data.index.year
+
+	dataset_ids = np.zeros(len(processed_data), dtype=np.int8)
+
 	for month in range(12):
 		
-		data_in_month = processed_data[processed_data.index.month == month+1]
+		in_month = months == month+1
 
-		test_in_month = data_in_month[data_in_month.index.year.isin(test_val_years[month][:num_training_years])]
-		test_data = pd.concat((test_data, test_in_month))
+		dataset_ids[in_month & data_years.isin(test_val_years[month][:num_training_years])] = 2
+		dataset_ids[in_month & data_years.isin(test_val_years[month][num_training_years:])] = 1
 
-		val_in_month = data_in_month[data_in_month.index.year.isin(test_val_years[month][num_training_years:])]
-		val_data = pd.concat((val_data, val_in_month))
-		
-	train_data = processed_data[~processed_data.index.isin(test_data.index.append(val_data.index))]
+	# order rows by dataset; val/test rows are grouped by month
+	sort_months = np.where(dataset_ids > 0, months, 0)
+	order = np.lexsort((np.arange(len(processed_data)), sort_months, dataset_ids))
+
+	# gather columns into one contiguous array
+	columns = [col for col in processed_data.columns if col != LABEL_COL] + [LABEL_COL]
+	values = np.empty((len(processed_data), len(columns)), dtype=np.float32)
+
+	for i, col in enumerate(columns):
+		values[:, i] = processed_data[col].to_numpy()[order]
+
+	ordered_data = pd.DataFrame(values, index=processed_data.index[order], columns=columns, copy=False)
+
+	# slice datasets
+	train_end, val_end = np.cumsum(np.bincount(dataset_ids, minlength=3))[:2]
+
+	train_data = ordered_data.iloc[:train_end]
+	val_data = ordered_data.iloc[train_end:val_end]
+	test_data = ordered_data.iloc[val_end:]
 
 	return train_data, val_data, test_data
 
 def split_features(dataset: pd.DataFrame) -> tuple:
+	'''
+	Split dataset into features and labels without copying. Expects the 
+	label column last (see split_data).
+	'''
+
+	assert dataset.columns[-1] == LABEL_COL, f"expected label column '{LABEL_COL}' last"
 
-	features = dataset.copy()
-	labels = features.pop('D')
+	features = dataset.iloc[:, :-1]
+	labels = dataset.iloc[:, -1]
 
 	return features, labels
 
@@ -0,0 +1,137 @@
+import argparse
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(THIS_DIR), "src")
+
+sys.path.insert(0, SRC_DIR)
+
+from process_data import FEATURE_COL_MAPPER, populate_fixed_effects, split_data, split_features
+
+# previous implementation (float64/int64, copies and concatenation), kept for comparison
+
+def old_populate_fixed_effects(processed_data: pd.DataFrame) -> None:
+    processed_data['W'] = processed_data.index.weekday
+
+    julian_day = processed_data.index.map(old_get_julian_day)
+
+    processed_data['M-sine'] = np.sin(2 * np.pi * julian_day / 365.)
+    processed_data['M-cosine'] = np.cos(2 * np.pi * julian_day / 365.)
+
+    return None
+
+def old_get_julian_day(date_time: datetime) -> int:
+    return date_time.timetuple().tm_yday
+
+def old_split_data(processed_data: pd.DataFrame) -> tuple:
+    test_data = pd.DataFrame()
+    val_data = pd.DataFrame()
+
+    np.random.seed(1)
+
+    years = np.unique(processed_data.index.year)
+
+    num_training_years = len(years) // 4
+
+    test_val_years = [np.random.choice(range(min(years),max(years)+1),2*num_training_years,replace=False) for i in range(12)]
+
+    for month in range(12):
+        data_in_month = processed_data[processed_data.index.month == month+1]
+
+        test_in_month = data_in_month[data_in_month.index.year.isin(test_val_years[month][:num_training_years])]
+        test_data = pd.concat((test_data, test_in_month))
+
+        val_in_month = data_in_month[data_in_month.index.year.isin(test_val_years[month][num_training_years:])]
+        val_data = pd.concat((val_data, val_in_month))
+
+    train_data = processed_data[~processed_data.index.isin(test_data.index.append(val_data.index))]
+
+    return train_data, val_data, test_data
+
+def old_split_features(dataset: pd.DataFrame) -> tuple:
+    features = dataset.copy()
+    labels = features.pop('D')
+
+    return features, labels
+
+def make_cleaned_data(first_year: int, last_year: int, dtype) -> pd.DataFrame:
+    '''
+    Synthetic daily cleaned data (as loaded from the cleaned data file) without leap days.
+    '''
+
+    index = pd.date_range(f"{first_year}-01-01", f"{last_year}-12-31", freq="D", name="Datetime")
+    index = index[~((index.month == 2) & (index.day == 29))]
+
+    rng = np.random.default_rng(0)
+    cleaned_data = pd.DataFrame({"Temperature (K)": rng.uniform(250., 320., len(index)).astype(dtype),
+        "Demand (MW)": rng.uniform(1e4, 1e5, len(index)).astype(dtype)}, index=index)
+
+    return cleaned_data
+
+def run_old(cleaned_data: pd.DataFrame) -> list:
+    processed_data = cleaned_data.copy()
+    processed_data.rename(columns=FEATURE_COL_MAPPER, inplace=True)
+    old_populate_fixed_effects(processed_data)
+
+    return [old_split_features(dataset) for dataset in old_split_data(processed_data)]
+
+def run_new(cleaned_data: pd.DataFrame) -> list:
+    processed_data = cleaned_data
+    processed_data.rename(columns=FEATURE_COL_MAPPER, inplace=True)
+    populate_fixed_effects(processed_data)
+
+    return [split_features(dataset) for dataset in split_data(processed_data)]
+
+def measure_peak(run, cleaned_data: pd.DataFrame) -> tuple:
+    tracemalloc.start()
+    splits = run(cleaned_data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return splits, peak
+
+def get_base_array(array: np.ndarray) -> np.ndarray:
+    while array.base is not None:
+        array = array.base
+
+    return array
+
+def check_process_data_memory(first_year: int, last_year: int) -> None:
+    old_splits, old_peak = measure_peak(run_old, make_cleaned_data(first_year, last_year, np.float64))
+    new_splits, new_peak = measure_peak(run_new, make_cleaned_data(first_year, last_year, np.float32))
+
+    print(f"{last_year - first_year + 1} years: old peak {old_peak / 1e6:.2f} MB, new peak {new_peak / 1e6:.2f} MB "
+        f"({new_peak / old_peak:.0%})")
+
+    # same rows, order, and columns
+    for (old_features, old_labels), (new_features, new_labels) in zip(old_splits, new_splits):
+        assert old_features.index.equals(new_features.index)
+        assert old_labels.index.equals(new_labels.index)
+        assert list(old_features.columns) == list(new_features.columns)
+        assert old_labels.name == new_labels.name
+        np.testing.assert_allclose(old_features.values, new_features.values, rtol=1e-6, atol=1e-6)
+        np.testing.assert_allclose(old_labels.values, new_labels.values, rtol=1e-6)
+
+    # float32 views of one array
+    base = get_base_array(new_splits[0][0].values)
+    for features, labels in new_splits:
+        assert (features.dtypes == np.float32).all() and labels.dtype == np.float32
+        assert get_base_array(features.values) is base and get_base_array(labels.values) is base
+
+    assert new_peak < old_peak
+
+    return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Compare peak memory of feature engineering and splitting against the previous implementation.")
+    parser.add_argument("--first_year", type=int, default=1990)
+    parser.add_argument("--last_year", type=int, default=2019)
+
+    args = parser.parse_args()
+    check_process_data_memory(args.first_year, args.last_year)